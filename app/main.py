@@ -18,17 +18,31 @@ Routes:
         * probability for the positive class
         * binary prediction using the configured threshold (default 0.5)
         * model's ROC-AUC and version from metadata
+    - `GET /admin/traces`: Lists recent request traces (newest first);
+      only available when tracing is enabled and the `X-Admin-Token` header
+      matches `CHD_TRACE_ADMIN_TOKEN` (see `tracing`)
+    - `GET /admin/traces/{request_id}`: Returns a single request trace
 """
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
 import pandas as pd
 from pathlib import Path
-from fastapi import FastAPI, Request
+from typing import Optional
+
+from fastapi import (
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+)
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from . import tracing
 from .artifacts import load_bundle
 from .schemas import PredictRequest, PredictResponse
 
@@ -38,9 +52,13 @@ BASE_DIR = Path(__file__).resolve().parent
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     app.state.bundle = load_bundle()
+    app.state.tracer = tracing.Tracer.from_env()
 
     yield
 
+    if app.state.tracer is not None:
+        app.state.tracer.close()
+
 
 app = FastAPI(
     title="Coronary Heart Disease Predictor",
@@ -48,6 +66,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(tracing.TracingMiddleware)
+
 
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
@@ -71,21 +91,61 @@ def healthz():
 
 @app.post("/predict", response_model=PredictResponse)
 def predict(req: PredictRequest):
+    tracing.enter_handler()
+
     b = app.state.bundle
     meta = b.metadata
 
     # Build a 1-row DF in the exact raw feature order
     raw_features = meta["raw_features"]
-    df = pd.DataFrame([req.model_dump()], columns=raw_features)
+    with tracing.span("dataframe"):
+        df = pd.DataFrame([req.model_dump()], columns=raw_features)
 
-    proba = float(b.pipeline.predict_proba(df)[0][1])
+    proba = float(tracing.predict_proba(b.pipeline, df)[0][1])
     threshold = float(meta.get("threshold", 0.5))
     pred = int(proba >= threshold)
 
-    return PredictResponse(
+    response = PredictResponse(
         prediction=pred,
         probability=proba,
         threshold=threshold,
         roc_auc=(meta.get("metrics", {}).get("ROC-AUC")),
         model_version=str(meta.get("version", "unknown")),
     )
+
+    tracing.exit_handler()
+
+    return response
+
+
+def _get_tracer(
+    x_admin_token: Optional[str] = Header(None),
+) -> tracing.Tracer:
+    tracer = getattr(app.state, "tracer", None)
+    if tracer is None:
+        raise HTTPException(status_code=404, detail="Tracing is disabled")
+    if not tracer.authorized(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    return tracer
+
+
+@app.get("/admin/traces", include_in_schema=False)
+def list_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    slow_only: bool = False,
+    tracer: tracing.Tracer = Depends(_get_tracer),
+):
+    return tracer.recent(limit=limit, slow_only=slow_only)
+
+
+@app.get("/admin/traces/{request_id}", include_in_schema=False)
+def get_trace(
+    request_id: str,
+    tracer: tracing.Tracer = Depends(_get_tracer),
+):
+    trace = tracer.get(request_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+
+    return trace
@@ -0,0 +1,182 @@
+import json
+import time
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.preprocessing import FeatureEngineer
+
+PAYLOAD = {
+    "sex": 1,
+    "age": 55,
+    "education_level": 2,
+    "current_smoker": 1,
+    "cigs_per_day": 10,
+    "bp_meds": 0,
+    "prevalent_stroke": 0,
+    "prevalent_hypertension": 1,
+    "diabetes": 0,
+    "total_cholesterol": 220,
+    "systolic_bp": 135,
+    "diastolic_bp": 85,
+    "bmi": 26.5,
+    "heart_rate": 72,
+    "glucose": 90
+}
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+def enable_tracing(monkeypatch, **env):
+    monkeypatch.setenv("CHD_TRACING", "1")
+    # Fast requests stay below the threshold unless a test lowers it
+    monkeypatch.setenv("CHD_TRACE_SLOW_MS", "60000")
+    monkeypatch.setenv("CHD_TRACE_ADMIN_TOKEN", ADMIN["X-Admin-Token"])
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+
+def test_traces_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("CHD_TRACING", raising=False)
+
+    with TestClient(app) as client:
+        r = client.post("/predict", json=PAYLOAD)
+        assert "X-Request-ID" not in r.headers
+        r = client.get("/admin/traces", headers=ADMIN)
+        assert r.status_code == 404
+
+def test_admin_requires_token(monkeypatch):
+    enable_tracing(monkeypatch)
+
+    with TestClient(app) as client:
+        assert client.get("/admin/traces").status_code == 401
+        r = client.get("/admin/traces", headers={"X-Admin-Token": "wrong"})
+        assert r.status_code == 401
+        assert client.get("/admin/traces", headers=ADMIN).status_code == 200
+
+        paths = client.get("/openapi.json").json()["paths"]
+        assert not any(p.startswith("/admin") for p in paths)
+
+    # Without a configured token the endpoints stay closed
+    monkeypatch.delenv("CHD_TRACE_ADMIN_TOKEN")
+    with TestClient(app) as client:
+        assert client.get("/admin/traces", headers=ADMIN).status_code == 401
+
+def test_predict_is_traced(monkeypatch):
+    enable_tracing(monkeypatch)
+
+    with TestClient(app) as client:
+        r = client.post("/predict", json=PAYLOAD)
+        assert r.status_code == 200
+        request_id = r.headers["X-Request-ID"]
+
+        r = client.get(f"/admin/traces/{request_id}", headers=ADMIN)
+        assert r.status_code == 200
+        trace = r.json()
+        names = [s["name"] for s in trace["spans"]]
+        for name in ("validation", "dataframe", "feat", "prep", "model",
+                     "serialization"):
+            assert name in names
+        assert trace["status_code"] == 200
+        assert trace["slow"] is False
+        assert "profile" not in trace
+
+def test_traced_probability_matches_untraced(monkeypatch):
+    monkeypatch.delenv("CHD_TRACING", raising=False)
+    with TestClient(app) as client:
+        untraced = client.post("/predict", json=PAYLOAD).json()
+
+    enable_tracing(monkeypatch)
+    with TestClient(app) as client:
+        traced = client.post("/predict", json=PAYLOAD).json()
+
+    assert traced["probability"] == untraced["probability"]
+    assert traced["prediction"] == untraced["prediction"]
+
+def test_request_id_is_echoed_or_replaced(monkeypatch):
+    enable_tracing(monkeypatch)
+
+    with TestClient(app) as client:
+        r = client.post(
+            "/predict", json=PAYLOAD, headers={"X-Request-ID": "abc-123.x_y"}
+        )
+        assert r.headers["X-Request-ID"] == "abc-123.x_y"
+        r = client.get("/admin/traces/abc-123.x_y", headers=ADMIN)
+        assert r.status_code == 200
+
+        for bad in ("a" * 65, "bad id", "../etc"):
+            r = client.post(
+                "/predict", json=PAYLOAD, headers={"X-Request-ID": bad}
+            )
+            assert r.headers["X-Request-ID"] != bad
+
+def test_only_predict_is_traced(monkeypatch):
+    enable_tracing(monkeypatch)
+
+    with TestClient(app) as client:
+        for path in ("/", "/healthz", "/docs", "/openapi.json",
+                     "/static/style.css"):
+            r = client.get(path)
+            assert r.status_code == 200
+            assert "X-Request-ID" not in r.headers
+        assert client.get("/admin/traces", headers=ADMIN).json() == []
+
+        client.post("/predict", json=PAYLOAD)
+        traces = client.get("/admin/traces", headers=ADMIN).json()
+        assert [t["path"] for t in traces] == ["/predict"]
+
+def test_slow_request_is_profiled(monkeypatch):
+    enable_tracing(
+        monkeypatch, CHD_TRACE_SLOW_MS=20, CHD_TRACE_SAMPLE_MS=1
+    )
+
+    transform = FeatureEngineer.transform
+
+    def slow_transform(self, X):
+        time.sleep(0.2)
+        return transform(self, X)
+
+    monkeypatch.setattr(FeatureEngineer, "transform", slow_transform)
+
+    with TestClient(app) as client:
+        r = client.post("/predict", json=PAYLOAD)
+        trace = client.get(
+            f"/admin/traces/{r.headers['X-Request-ID']}", headers=ADMIN
+        ).json()
+
+    assert trace["slow"] is True
+    profile = trace["profile"]
+    assert profile["samples"] > 0
+    # Only the handler thread is sampled, never the shared event loop
+    assert "slow_transform" in profile["stacks"][0]["stack"]
+    assert not any("selectors" in s["stack"] for s in profile["stacks"])
+
+def test_slow_only_filter_and_buffer_size(monkeypatch):
+    enable_tracing(monkeypatch, CHD_TRACE_BUFFER=2)
+
+    with TestClient(app) as client:
+        ids = [
+            client.post("/predict", json=PAYLOAD).headers["X-Request-ID"]
+            for _ in range(3)
+        ]
+        traces = client.get("/admin/traces", headers=ADMIN).json()
+        assert [t["request_id"] for t in traces] == ids[:0:-1]
+        r = client.get("/admin/traces/" + ids[0], headers=ADMIN)
+        assert r.status_code == 404
+
+        r = client.get(
+            "/admin/traces", params={"slow_only": True}, headers=ADMIN
+        )
+        assert r.json() == []
+
+def test_traces_written_to_file(monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    enable_tracing(monkeypatch, CHD_TRACE_FILE=path)
+
+    with TestClient(app) as client:
+        ids = [
+            client.post("/predict", json=PAYLOAD).headers["X-Request-ID"]
+            for _ in range(2)
+        ]
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    entries = [json.loads(line) for line in lines]
+    assert [e["request_id"] for e in entries] == ids
+    assert all(e["path"] == "/predict" for e in entries)
@@ -0,0 +1,467 @@
+"""Opt-in request tracing with sampled profiling of slow requests.
+
+This module provides lightweight, in-process tracing for the FastAPI service.
+When enabled, every `/predict` request gets a request ID (taken from the incoming
+`X-Request-ID` header if it is at most 64 characters of `[A-Za-z0-9._-]`,
+generated otherwise) and records span timings for the stages of inference:
+    - `validation`: from the request entering the middleware to the handler
+      being called (body read and `PredictRequest` validation)
+    - `dataframe`: building the 1-row pandas DataFrame
+    - one span per `Pipeline` step (`feat`, `prep`, `model`)
+    - `serialization`: from the handler returning to the response start being
+      sent (`PredictResponse` validation and JSON encoding)
+
+Requests slower than a configurable threshold also get a sampled stack
+profile: a single watchdog thread per tracer keeps a registry of in-flight
+requests and, for every request past the threshold, samples the stacks of the
+handler threads serving it (registered by `enter_handler` and `span`, and
+released by `exit_handler`) at a fixed interval until it finishes. The
+event-loop thread is shared by all requests and is never sampled. The
+watchdog sleeps while no request is in flight.
+
+The middleware is pure ASGI: with tracing disabled it hands the request
+straight to the application.
+
+Finished traces are kept in an in-memory ring buffer (queried through the
+`/admin/traces` endpoints, which require the `X-Admin-Token` header to match
+`CHD_TRACE_ADMIN_TOKEN`) and, optionally, appended as JSON lines to a local
+rotating file. The file is written by a `QueueListener` thread, off the event
+loop.
+
+Configuration (environment variables, read at application startup):
+    - `CHD_TRACING`: set to `1`/`true`/`yes` to enable tracing (default off)
+    - `CHD_TRACE_SLOW_MS`: latency threshold for profiling (default 200)
+    - `CHD_TRACE_SAMPLE_MS`: stack sampling interval (default 5)
+    - `CHD_TRACE_BUFFER`: number of traces kept in memory (default 500)
+    - `CHD_TRACE_FILE`: path of the rotating JSON-lines file (default unset)
+    - `CHD_TRACE_FILE_MAX_BYTES`: rotation size (default 5 MB)
+    - `CHD_TRACE_FILE_BACKUPS`: number of rotated files kept (default 3)
+    - `CHD_TRACE_ADMIN_TOKEN`: token required to query the traces (default
+      unset, which keeps the admin endpoints closed)
+"""
+from __future__ import annotations
+
+import hmac
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+REQUEST_ID_HEADER = "X-Request-ID"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+# Only inference is traced; health checks, docs, and assets would otherwise
+# push the interesting traces out of the ring buffer
+TRACED_PATHS = ("/predict",)
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class TracingConfig:
+    """Tracing settings.
+
+    Attributes:
+        enabled: Whether requests are traced at all
+        slow_ms: Latency above which a stack profile is captured
+        sample_interval_ms: Interval between two stack samples
+        buffer_size: Maximum number of traces kept in memory
+        file: Optional path of the rotating JSON-lines trace file
+        file_max_bytes: Size at which the trace file is rotated
+        file_backups: Number of rotated trace files kept
+        admin_token: Token required to query the traces; None keeps the admin
+            endpoints closed
+    """
+    enabled: bool = False
+    slow_ms: float = 200.0
+    sample_interval_ms: float = 5.0
+    buffer_size: int = 500
+    file: Optional[Path] = None
+    file_max_bytes: int = 5_000_000
+    file_backups: int = 3
+    admin_token: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "TracingConfig":
+        file = os.environ.get("CHD_TRACE_FILE")
+
+        return cls(
+            enabled=_env_flag("CHD_TRACING"),
+            slow_ms=float(os.environ.get("CHD_TRACE_SLOW_MS", cls.slow_ms)),
+            sample_interval_ms=float(
+                os.environ.get("CHD_TRACE_SAMPLE_MS", cls.sample_interval_ms)
+            ),
+            buffer_size=int(
+                os.environ.get("CHD_TRACE_BUFFER", cls.buffer_size)
+            ),
+            file=Path(file) if file else None,
+            file_max_bytes=int(
+                os.environ.get("CHD_TRACE_FILE_MAX_BYTES", cls.file_max_bytes)
+            ),
+            file_backups=int(
+                os.environ.get("CHD_TRACE_FILE_BACKUPS", cls.file_backups)
+            ),
+            admin_token=os.environ.get("CHD_TRACE_ADMIN_TOKEN") or None,
+        )
+
+
+@dataclass
+class Trace:
+    """Mutable state of a single in-flight request.
+
+    Timestamps are `time.perf_counter()` values; spans are stored relative to
+    `start`, in milliseconds.
+    """
+    request_id: str
+    method: str
+    path: str
+    start: float = field(default_factory=time.perf_counter)
+    started_at: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat()
+    )
+    spans: List[Dict[str, Any]] = field(default_factory=list)
+    threads: Set[int] = field(default_factory=set)
+    handler_end: Optional[float] = None
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        self.spans.append(
+            {
+                "name": name,
+                "start_ms": (start - self.start) * 1e3,
+                "duration_ms": (end - start) * 1e3,
+            }
+        )
+
+
+def _collapse(frame) -> str:
+    """Render a frame's stack root-first as `module:function:line;...`."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        parts.append(f"{module}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+
+    return ";".join(reversed(parts))
+
+
+class _JsonLinesFormatter(logging.Formatter):
+    """Serialize a trace entry carried as the record's `msg`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg)
+
+
+class Tracer:
+    """Collects finished traces and profiles requests that run slow.
+
+    Finished traces go to a ring buffer and, optionally, a rotating file.
+    In-flight traces are kept in a registry watched by a single daemon
+    thread, which samples those running longer than `slow_ms`.
+    """
+
+    def __init__(self, config: TracingConfig):
+        self.config = config
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=config.buffer_size)
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._handler: Optional[RotatingFileHandler] = None
+        self._listener: Optional[QueueListener] = None
+
+        if config.file is not None:
+            config.file.parent.mkdir(parents=True, exist_ok=True)
+            self._handler = RotatingFileHandler(
+                config.file,
+                maxBytes=config.file_max_bytes,
+                backupCount=config.file_backups,
+                encoding="utf-8",
+            )
+            self._handler.setFormatter(_JsonLinesFormatter())
+            self._queue = queue.SimpleQueue()
+            self._listener = QueueListener(self._queue, self._handler)
+            self._listener.start()
+
+        self._in_flight: Dict[int, Trace] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._watchdog = threading.Thread(
+            target=self._watch, name="trace-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    @classmethod
+    def from_env(cls) -> Optional["Tracer"]:
+        """Build a tracer from the environment, or None if disabled."""
+        config = TracingConfig.from_env()
+
+        return cls(config) if config.enabled else None
+
+    def close(self) -> None:
+        """Stop the watchdog, flush pending traces, and close the file."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._watchdog.join()
+
+        if self._listener is not None:
+            self._listener.stop()
+            self._handler.close()
+            self._listener = self._handler = self._queue = None
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Whether `token` grants access to the recorded traces."""
+        expected = self.config.admin_token
+        if expected is None or token is None:
+            return False
+
+        return hmac.compare_digest(token.encode(), expected.encode())
+
+    def begin(self, trace: Trace) -> None:
+        """Register an in-flight trace with the watchdog."""
+        with self._cond:
+            self._in_flight[id(trace)] = trace
+            self._cond.notify()
+
+    def end(self, trace: Trace) -> None:
+        """Unregister a trace; it is not sampled after this returns."""
+        with self._cond:
+            self._in_flight.pop(id(trace), None)
+
+    def _watch(self) -> None:
+        slow_s = self.config.slow_ms / 1e3
+        interval_s = self.config.sample_interval_ms / 1e3
+
+        with self._cond:
+            while not self._closed:
+                now = time.perf_counter()
+                traces = list(self._in_flight.values())
+                due = [t for t in traces if now - t.start >= slow_s]
+
+                if due:
+                    frames = sys._current_frames()
+                    for trace in due:
+                        trace.samples += 1
+                        for ident in tuple(trace.threads):
+                            frame = frames.get(ident)
+                            if frame is not None:
+                                trace.stacks[_collapse(frame)] += 1
+                    del frames
+                    timeout = interval_s
+                elif traces:
+                    # Sleep until the oldest request crosses the threshold
+                    timeout = min(t.start for t in traces) + slow_s - now
+                else:
+                    timeout = None
+
+                self._cond.wait(timeout)
+
+    def record(
+        self, trace: Trace, status_code: int, end: float
+    ) -> Dict[str, Any]:
+        duration_ms = (end - trace.start) * 1e3
+        slow = duration_ms >= self.config.slow_ms
+
+        entry: Dict[str, Any] = {
+            "request_id": trace.request_id,
+            "method": trace.method,
+            "path": trace.path,
+            "status_code": status_code,
+            "started_at": trace.started_at,
+            "duration_ms": duration_ms,
+            "slow": slow,
+            "spans": trace.spans,
+        }
+        if slow:
+            entry["profile"] = {
+                "interval_ms": self.config.sample_interval_ms,
+                "samples": trace.samples,
+                "stacks": [
+                    {"stack": stack, "count": count}
+                    for stack, count in trace.stacks.most_common()
+                ],
+            }
+
+        with self._lock:
+            self._buffer.append(entry)
+        if self._queue is not None:
+            # Serialized and written by the listener thread
+            self._queue.put_nowait(logging.makeLogRecord({"msg": entry}))
+
+        return entry
+
+    def recent(
+        self, limit: int = 50, slow_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Return up to `limit` traces, most recent first."""
+        with self._lock:
+            entries = list(self._buffer)
+
+        if slow_only:
+            entries = [e for e in entries if e["slow"]]
+
+        return entries[::-1][:limit]
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Return the most recent trace with the given request ID, if any."""
+        with self._lock:
+            for entry in reversed(self._buffer):
+                if entry["request_id"] == request_id:
+                    return entry
+
+        return None
+
+
+# Helpers called from request handlers; all are no-ops without an active trace
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Record the duration of the enclosed block as a span."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    trace.threads.add(threading.get_ident())
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, time.perf_counter())
+
+
+def enter_handler() -> None:
+    """Close the `validation` span; call first thing in a traced handler."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+
+    trace.threads.add(threading.get_ident())
+    trace.add_span("validation", trace.start, time.perf_counter())
+
+
+def exit_handler() -> None:
+    """Open the `serialization` span; call right before returning.
+
+    The calling thread stops being sampled, since a pool thread may go on to
+    serve another request.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.threads.discard(threading.get_ident())
+        trace.handler_end = time.perf_counter()
+
+
+def predict_proba(pipeline, X):
+    """Call `pipeline.predict_proba`, with one span per step when traced.
+
+    Without an active trace the pipeline is called directly. Otherwise the
+    intermediate steps are applied one by one with `transform` (skipping
+    `None`/`"passthrough"` steps) and the final estimator with
+    `predict_proba`, which is what `Pipeline.predict_proba` does internally.
+    """
+    if _current_trace.get() is None:
+        return pipeline.predict_proba(X)
+
+    Xt = X
+    for name, step in pipeline.steps[:-1]:
+        if step is None or step == "passthrough":
+            continue
+        with span(name):
+            Xt = step.transform(Xt)
+
+    name, model = pipeline.steps[-1]
+    with span(name):
+        return model.predict_proba(Xt)
+
+
+def _request_id(headers: List[Tuple[bytes, bytes]]) -> str:
+    """Return the client's request ID if well formed, else a new one."""
+    header = REQUEST_ID_HEADER.lower().encode("latin-1")
+    for name, value in headers:
+        if name.lower() == header:
+            candidate = value.decode("latin-1")
+            if REQUEST_ID_PATTERN.fullmatch(candidate):
+                return candidate
+            break
+
+    return uuid.uuid4().hex
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware that traces HTTP requests if tracing is enabled.
+
+    The tracer is read from `app.state.tracer`; when it is missing (tracing
+    disabled), the scope is not HTTP, or the path is not in `TRACED_PATHS`,
+    the request is passed straight to the wrapped application.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tracer: Optional[Tracer] = None
+        if scope["type"] == "http":
+            tracer = getattr(scope["app"].state, "tracer", None)
+        if tracer is None or scope["path"] not in TRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(
+            request_id=_request_id(scope["headers"]),
+            method=scope["method"],
+            path=scope["path"],
+        )
+        status_code = 500
+        response_start: Optional[float] = None
+
+        async def send_traced(message):
+            nonlocal status_code, response_start
+            if message["type"] == "http.response.start":
+                response_start = time.perf_counter()
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (
+                        REQUEST_ID_HEADER.lower().encode("latin-1"),
+                        trace.request_id.encode("latin-1"),
+                    )
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_trace.set(trace)
+        tracer.begin(trace)
+        try:
+            await self.app(scope, receive, send_traced)
+        finally:
+            end = time.perf_counter()
+            tracer.end(trace)
+            _current_trace.reset(token)
+            if trace.handler_end is not None:
+                trace.add_span(
+                    "serialization",
+                    trace.handler_end,
+                    response_start if response_start is not None else end,
+                )
+            tracer.record(trace, status_code, end)
@@ -0,0 +1,359 @@
+"""Cross-validated comparison of candidate coronary heart disease classifiers.
+
+This module replaces the serial, interactive model comparison loops from
+`notebooks/3_model_development.ipynb` and
+`notebooks/4_validation_and_model_selection.ipynb` with a standalone program.
+Every candidate is wrapped in the exact `FeatureEngineer` + `ColumnTransformer`
+preprocessing used by `scripts/train_and_export.py`, so the ranking reflects
+the pipeline that would actually be exported and served.
+
+High-level workflow:
+    1. Load and clean `data/coronary_disease.csv` (shared `clean_df`)
+    2. Load stratified k-fold splits from the cache, or create and cache them
+       when the cache is missing or does not match the requested setup
+    3. Evaluate each (candidate, fold) pair in a process pool: fit on the
+       training indices, score on the held-out indices, and time `fit`,
+       the batch `predict_proba`, and repeated 1-row `predict_proba` calls
+    4. Average the per-fold results and print a table ranked by the chosen
+       metric (optionally written to CSV)
+
+Reported metrics match the training script: accuracy, recall, precision,
+F1-score, and ROC-AUC. Fit and batch predict times are reported per fold
+(seconds). Because `/predict` scores one row at a time, the median latency of
+a 1-row `predict_proba` call (microseconds) is reported as well, so inference
+cost is part of the choice.
+
+Usage (from the repository's root directory):
+
+    python3 ./scripts/compare_models.py --folds 5 --workers 4
+
+Notes:
+    - Fold splits are cached in `data/cv_folds.pkl` by default; the cache is
+      reused only if the number of folds, the seed, and a hash of the cleaned
+      target and row index match
+    - Timings are measured inside worker processes, each limited to a single
+      BLAS/OpenMP thread. The pool defaults to the number of physical cores;
+      running more workers than that inflates the timings
+    - SVC is the slowest candidate to fit and, with `probability=True`, to
+      predict; it is kept so that cost shows in the table
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (
+    accuracy_score,
+    recall_score,
+    roc_auc_score,
+    precision_score,
+    f1_score,
+)
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC
+from threadpoolctl import threadpool_limits
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(ROOT))
+
+from scripts.train_and_export import (
+    DATA_PATH,
+    RAW_FEATS,
+    TARGET,
+    build_pipeline,
+    clean_df,
+)
+
+FOLDS_CACHE = ROOT / "data" / "cv_folds.pkl"
+
+METRICS = ["accuracy", "recall", "precision", "F1-score", "ROC-AUC"]
+TIMINGS = ["fit_s", "predict_s", "predict_us_per_row", "latency_1row_us"]
+
+# Candidate models (shortlisted from the model development notebooks)
+CANDIDATES = {
+    "logreg_weighted": LogisticRegression(
+        class_weight={0: 1, 1: 10}, max_iter=2000
+    ),
+    "logreg_balanced": LogisticRegression(
+        class_weight="balanced", max_iter=2000
+    ),
+    "knn_7": KNeighborsClassifier(n_neighbors=7),
+    "knn_5_distance": KNeighborsClassifier(n_neighbors=5, weights="distance"),
+    "rf_balanced": RandomForestClassifier(
+        class_weight="balanced", random_state=42
+    ),
+    "rf_depth_5": RandomForestClassifier(
+        max_depth=5, class_weight="balanced", random_state=42
+    ),
+    "svc_rbf_balanced": SVC(
+        class_weight="balanced", probability=True, random_state=42
+    ),
+}
+
+Fold = Tuple[np.ndarray, np.ndarray]
+
+# Worker-local data, set once per process by `_init_worker`
+_X: Optional[pd.DataFrame] = None
+_y: Optional[pd.Series] = None
+
+
+# AUXILIARY FUNCTIONS
+def load_folds(
+    y: pd.Series, n_splits: int, seed: int, cache_path: Path
+) -> List[Fold]:
+    """Return stratified k-fold splits, reusing the on-disk cache if valid.
+
+    The cache stores the split indices together with the parameters used to
+    create them and a hash of the target values and row index. It is only
+    reused when all of them match, so any change to the data (even one that
+    keeps the row count) regenerates the splits and overwrites the cache.
+
+    Args:
+        y: Target vector used for stratification
+        n_splits: Number of folds
+        seed: Random seed for shuffling
+        cache_path: Location of the Joblib-serialized cache
+
+    Returns:
+        A list of `(train_idx, test_idx)` positional index arrays
+    """
+    key = {
+        "n_rows": len(y),
+        "n_splits": n_splits,
+        "seed": seed,
+        "data_hash": joblib.hash((y.index.to_numpy(), y.to_numpy())),
+    }
+
+    if cache_path.exists():
+        cached = joblib.load(cache_path)
+        if cached.get("key") == key:
+            return cached["folds"]
+
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    folds = list(skf.split(np.zeros(len(y)), y))
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump({"key": key, "folds": folds}, cache_path)
+
+    return folds
+
+
+def _init_worker(X: pd.DataFrame, y: pd.Series) -> None:
+    """Store the dataset once per worker and pin native thread pools.
+
+    `threadpool_limits` caps the already loaded BLAS/OpenMP libraries at one
+    thread per worker, which keeps workers from competing for cores, so a
+    candidate's timings do not depend on what else is running in the pool.
+    """
+    global _X, _y
+    _X, _y = X, y
+
+    threadpool_limits(limits=1)
+
+
+def evaluate_fold(
+    name: str,
+    model,
+    fold_id: int,
+    fold: Fold,
+    threshold: float,
+    latency_calls: int,
+) -> Dict[str, float]:
+    """Fit one candidate on one fold and score it on the held-out part.
+
+    Args:
+        name: Candidate identifier
+        model: Unfitted classifier; it is cloned before use
+        fold_id: Index of the fold being evaluated
+        fold: `(train_idx, test_idx)` positional index arrays
+        threshold: Decision threshold applied to the positive-class
+            probability
+        latency_calls: Number of 1-row `predict_proba` calls whose median
+            gives the single-row latency
+
+    Returns:
+        A flat dictionary with the candidate name, fold id, metrics, and
+        timings for this fold
+    """
+    train_idx, test_idx = fold
+    X_train, X_test = _X.iloc[train_idx], _X.iloc[test_idx]
+    y_train, y_test = _y.iloc[train_idx], _y.iloc[test_idx]
+
+    pipeline = build_pipeline(clone(model))
+
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    probability = pipeline.predict_proba(X_test)[:, 1]
+    predict_time = time.perf_counter() - start
+
+    predictions = (probability >= threshold).astype(int)
+
+    # What `/predict` pays: one call on a 1-row DataFrame
+    latencies = []
+    for i in range(latency_calls):
+        row = X_test.iloc[[i % len(X_test)]]
+        start = time.perf_counter()
+        pipeline.predict_proba(row)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "model": name,
+        "fold": fold_id,
+        "accuracy": accuracy_score(y_test, predictions),
+        "recall": recall_score(y_test, predictions),
+        "precision": precision_score(y_test, predictions, zero_division=0),
+        "F1-score": f1_score(y_test, predictions),
+        "ROC-AUC": roc_auc_score(y_test, probability),
+        "fit_s": fit_time,
+        "predict_s": predict_time,
+        "predict_us_per_row": predict_time / len(test_idx) * 1e6,
+        "latency_1row_us": float(np.median(latencies)) * 1e6,
+    }
+
+
+def summarize(results: pd.DataFrame, rank_by: str) -> pd.DataFrame:
+    """Aggregate per-fold results into a ranked, one-row-per-model table.
+
+    Metrics are reported as fold means with their standard deviation in an
+    adjacent `<metric>_std` column; timings are reported as fold means.
+
+    Args:
+        results: Per-fold results as returned by `evaluate_fold`
+        rank_by: Column used to rank the candidates (higher is better for
+            metrics, lower is better for timings)
+
+    Returns:
+        The summary table sorted by `rank_by`, with a 1-based `rank` index
+    """
+    grouped = results.drop(columns="fold").groupby("model")
+    means = grouped.mean()
+    stds = grouped[METRICS].std().add_suffix("_std")
+
+    columns = []
+    for metric in METRICS:
+        columns += [metric, f"{metric}_std"]
+    columns += TIMINGS
+
+    table = means.join(stds)[columns]
+    table = table.sort_values(rank_by, ascending=rank_by not in METRICS)
+    table = table.reset_index()
+    table.index = pd.RangeIndex(1, len(table) + 1, name="rank")
+
+    return table
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--folds", type=int, default=5, help="Number of CV folds."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="Seed for the fold shuffling."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=joblib.cpu_count(only_physical_cores=True),
+        help="Size of the process pool (defaults to the physical cores).",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.5,
+        help="Decision threshold for the thresholded metrics.",
+    )
+    parser.add_argument(
+        "--latency-calls",
+        type=int,
+        default=50,
+        help="Number of 1-row predict calls timed per fold.",
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=sorted(CANDIDATES),
+        default=list(CANDIDATES),
+        help="Subset of candidate models to compare.",
+    )
+    parser.add_argument(
+        "--rank-by",
+        default="ROC-AUC",
+        choices=METRICS + TIMINGS,
+        help="Column used to rank the candidates.",
+    )
+    parser.add_argument(
+        "--folds-cache",
+        type=Path,
+        default=FOLDS_CACHE,
+        help="Location of the cached fold splits.",
+    )
+    parser.add_argument(
+        "--out", type=Path, default=None, help="Optional CSV output path."
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the cross-validated comparison and print the ranked table.
+
+    Loads and cleans the dataset, loads (or creates) the cached fold splits,
+    evaluates every (candidate, fold) pair across a process pool, and prints
+    the aggregated results ranked by the requested column.
+    """
+    args = parse_args(argv)
+
+    data = clean_df(in_path=DATA_PATH)
+
+    X = data[RAW_FEATS].copy()
+    y = data[TARGET].astype(int)
+
+    folds = load_folds(y, args.folds, args.seed, args.folds_cache)
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(X, y)
+    ) as pool:
+        futures = [
+            pool.submit(
+                evaluate_fold,
+                name,
+                CANDIDATES[name],
+                fold_id,
+                fold,
+                args.threshold,
+                args.latency_calls,
+            )
+            for name in args.models
+            for fold_id, fold in enumerate(folds)
+        ]
+        results = pd.DataFrame([f.result() for f in futures])
+
+    table = summarize(results, args.rank_by)
+
+    with pd.option_context("display.width", None, "display.precision", 4):
+        print(table.to_string())
+
+    if args.out is not None:
+        table.to_csv(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -90,6 +90,32 @@ RAW_FEATS = [
     "glucose",
 ]
 
+# What the model actually consumes:
+# Engineered variables
+ENGINEERED = ["smoker_intensity", "pulse_pressure"]
+# Scale continuous numeric variables
+SCALED_NUM = [
+    "age",
+    "bmi",
+    "systolic_bp",
+    "diastolic_bp",
+    "total_cholesterol",
+    "glucose",
+    "heart_rate",
+    "pulse_pressure",
+    "smoker_intensity",
+]
+# Pass-through (not scaled): binaries + ordinal
+PASSTHROUGH = [
+    "sex",
+    "education_level",
+    "current_smoker",
+    "bp_meds",
+    "prevalent_stroke",
+    "prevalent_hypertension",
+    "diabetes",
+]
+
 
 # AUXILIARY CLASSES
 @dataclass(frozen=True)
@@ -179,6 +205,37 @@ def clean_df(in_path: Path) -> pd.DataFrame:
     return data
 
 
+def build_pipeline(model) -> Pipeline:
+    """Wrap a classifier with the shared feature engineering and scaling.
+
+    Every candidate model, whether exported or only compared, goes through the
+    same `FeatureEngineer` and `ColumnTransformer` steps so that offline
+    metrics reflect what the API will actually serve.
+
+    Args:
+        model: An unfitted scikit-learn classifier exposing `predict_proba`
+
+    Returns:
+        An unfitted Pipeline with `feat`, `prep`, and `model` steps
+    """
+    preprocess = ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), SCALED_NUM),
+            ("cat", "passthrough", PASSTHROUGH),
+        ],
+        remainder="drop",
+        verbose_feature_names_out=False,
+    )
+
+    return Pipeline(
+        steps=[
+            ("feat", FeatureEngineer()),
+            ("prep", preprocess),
+            ("model", model),
+        ]
+    )
+
+
 def main():
     """Train, evaluate, and persist the model pipeline and metadata.
 
@@ -196,51 +253,9 @@ def main():
         X, y, test_size=0.2, random_state=42, stratify=y
     )
 
-    # What the model actually consumes:
-    # Engineered variables
-    engineered = ["smoker_intensity", "pulse_pressure"]
-    # Scale continuous numeric variables
-    scaled_num = [
-        "age",
-        "bmi",
-        "systolic_bp",
-        "diastolic_bp",
-        "total_cholesterol",
-        "glucose",
-        "heart_rate",
-        "pulse_pressure",
-        "smoker_intensity",
-    ]
-    # Pass-through (not scaled): binaries + ordinal
-    passthrough = [
-        "sex",
-        "education_level",
-        "current_smoker",
-        "bp_meds",
-        "prevalent_stroke",
-        "prevalent_hypertension",
-        "diabetes",
-    ]
-
-    # Build preprocessing and model pipeline
-    preprocess = ColumnTransformer(
-        transformers=[
-            ("num", StandardScaler(), scaled_num),
-            ("cat", "passthrough", passthrough),
-        ],
-        remainder="drop",
-        verbose_feature_names_out=False,
-    )
-
     model = LogisticRegression(class_weight={0: 1, 1: 10}, max_iter=2000)
 
-    pipeline = Pipeline(
-        steps=[
-            ("feat", FeatureEngineer()),
-            ("prep", preprocess),
-            ("model", model),
-        ]
-    )
+    pipeline = build_pipeline(model)
 
     # Scaler is fit only in the X_train through the pipeline
     pipeline.fit(X_train, y_train)
@@ -266,9 +281,9 @@ def main():
         version=str(date.today()),
         target=TARGET,
         raw_features=RAW_FEATS,
-        engineered_features=engineered,
-        model_features_scaled=scaled_num,
-        model_features_passthrough=passthrough,
+        engineered_features=ENGINEERED,
+        model_features_scaled=SCALED_NUM,
+        model_features_passthrough=PASSTHROUGH,
         threshold=0.5,
         metrics=metrics,
         notes=(
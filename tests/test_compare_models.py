@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from scripts import compare_models
+from scripts.compare_models import load_folds, summarize
+
+def _target():
+    return pd.Series([0, 1] * 10, name="ten_year_chd")
+
+def test_load_folds_reuses_cache(tmp_path, monkeypatch):
+    cache = tmp_path / "folds.pkl"
+    folds = load_folds(_target(), 5, 42, cache)
+    assert cache.exists()
+
+    # A cache hit must not split again
+    def fail(*args, **kwargs):
+        raise AssertionError("folds were regenerated")
+    monkeypatch.setattr(compare_models, "StratifiedKFold", fail)
+
+    cached = load_folds(_target(), 5, 42, cache)
+    assert len(cached) == len(folds)
+    for (tr_a, te_a), (tr_b, te_b) in zip(folds, cached):
+        assert (tr_a == tr_b).all() and (te_a == te_b).all()
+
+@pytest.mark.parametrize("change", ["seed", "n_splits", "labels"])
+def test_load_folds_invalidates_cache(tmp_path, monkeypatch, change):
+    cache = tmp_path / "folds.pkl"
+    load_folds(_target(), 5, 42, cache)
+
+    calls = []
+    original = compare_models.StratifiedKFold
+    def spy(*args, **kwargs):
+        calls.append(kwargs)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(compare_models, "StratifiedKFold", spy)
+
+    y = _target()
+    seed, n_splits = 42, 5
+    if change == "seed":
+        seed = 0
+    elif change == "n_splits":
+        n_splits = 4
+    else:
+        # Same row count, different labels
+        y = y[::-1].reset_index(drop=True)
+        y.iloc[0] = 1 - y.iloc[0]
+        y.iloc[1] = 1 - y.iloc[1]
+
+    folds = load_folds(y, n_splits, seed, cache)
+    assert len(calls) == 1
+    assert len(folds) == n_splits
+
+def _results():
+    rows = []
+    for name, auc, fit in (("fast_bad", 0.6, 0.1), ("slow_good", 0.8, 2.0)):
+        for fold in range(2):
+            row = {metric: auc for metric in compare_models.METRICS}
+            row.update({timing: fit for timing in compare_models.TIMINGS})
+            row.update({"model": name, "fold": fold})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def test_summarize_ranks_metrics_descending():
+    table = summarize(_results(), "ROC-AUC")
+    assert list(table["model"]) == ["slow_good", "fast_bad"]
+    assert list(table.index) == [1, 2]
+
+def test_summarize_ranks_timings_ascending():
+    table = summarize(_results(), "latency_1row_us")
+    assert list(table["model"]) == ["fast_bad", "slow_good"]
+
+def test_evaluate_fold_reports_metrics_and_timings():
+    y = pd.Series([0, 1] * 20, name="ten_year_chd")
+    X = pd.DataFrame(
+        {
+            feat: [float(i % 7 + j) for i in range(len(y))]
+            for j, feat in enumerate(compare_models.RAW_FEATS)
+        }
+    )
+    # Make the positive class separable so every metric is defined
+    X["age"] = X["age"] + 10 * y
+
+    compare_models._init_worker(X, y)
+    fold = next(
+        compare_models.StratifiedKFold(n_splits=4).split(X, y)
+    )
+    model = compare_models.LogisticRegression(max_iter=200)
+
+    result = compare_models.evaluate_fold("logreg", model, 0, fold, 0.5, 5)
+
+    assert result["model"] == "logreg"
+    assert result["fold"] == 0
+    for metric in compare_models.METRICS:
+        assert 0.0 <= result[metric] <= 1.0
+    for timing in compare_models.TIMINGS:
+        assert result[timing] > 0